@@ -1,33 +1,15 @@
 import streamlit as st
 import os
-
-try:
-    from event_llm_core import generate_titles, generate_description, fuzzy_correct, get_global_analytics, reset_analytics
-except Exception as e:
-    st.error("**Configuration Error**")
-    st.error("OpenAI API key is missing or invalid.")
-    st.markdown("""
-    ### How to fix this:
-    
-    **For Streamlit Cloud:**
-    1. Go to your app settings
-    2. Click on "Secrets" 
-    3. Add: `OPENAI_API_KEY = "your_api_key_here"`
-    
-    **For local development:**
-    1. Create a `.env` file
-    2. Add: `OPENAI_API_KEY=your_api_key_here`
-    
-    **Get your API key:**
-    - Visit: https://platform.openai.com/api-keys
-    - Create a new secret key
-    - Copy and paste it in the configuration above
-    """)
-    st.stop()
+import sys
+import html
+from types import MappingProxyType
+from fuzzy_match import fuzzy_correct
 
 st.set_page_config(page_title="EC - 172", layout="wide")
 
-st.markdown("""
+@st.cache_resource(show_spinner=False)
+def _css():
+    return """
 <style>
 section.main > div:first-child {background: #f8fafc; border-radius: 12px; padding: 2rem 2rem 1rem 2rem; box-shadow: 0 2px 8px #0001;}
 .stSelectbox [data-baseweb="select"] > div {border-radius: 8px;}
@@ -44,6 +26,30 @@ section.main > div:first-child {background: #f8fafc; border-radius: 12px; paddin
     line-height: 1.6;
     margin: 1rem 0;
 }
+.title-card {
+    background: #f8f9fa;
+    padding: 1rem;
+    border-radius: 8px;
+    border-left: 4px solid #2563eb;
+    color: #333;
+    margin-bottom: 0.5rem;
+}
+.metrics-grid {
+    display: grid;
+    grid-template-columns: repeat(4, 1fr);
+    gap: 1rem;
+    margin: 1rem 0;
+}
+.metrics-grid span {
+    display: block;
+    font-size: 0.875rem;
+    color: #555;
+}
+.metrics-grid b {
+    display: block;
+    font-size: 1.75rem;
+    font-weight: 400;
+}
 .optimization-tip {
     background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
     color: white;
@@ -61,96 +67,176 @@ section.main > div:first-child {background: #f8fafc; border-radius: 12px; paddin
     border-left: 4px solid #ff4757;
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(_css(), unsafe_allow_html=True)
+
+@st.cache_resource(show_spinner=False)
+def _core():
+    try:
+        import event_llm_core
+    except Exception as e:
+        st.error("**Configuration Error**")
+        st.error("OpenAI API key is missing or invalid.")
+        st.markdown("""
+        ### How to fix this:
+        
+        **For Streamlit Cloud:**
+        1. Go to your app settings
+        2. Click on "Secrets" 
+        3. Add: `OPENAI_API_KEY = "your_api_key_here"`
+        
+        **For local development:**
+        1. Create a `.env` file
+        2. Add: `OPENAI_API_KEY=your_api_key_here`
+        
+        **Get your API key:**
+        - Visit: https://platform.openai.com/api-keys
+        - Create a new secret key
+        - Copy and paste it in the configuration above
+        """)
+        st.stop()
+    return event_llm_core
+
+# Underscore arguments are not hashed by st.cache_data; _ran stays empty on a cache hit
+@st.cache_data(show_spinner=False, max_entries=128, ttl=3600)
+def _generate_titles(category, event_type, tone, num_titles, context, cost_mode, _ran):
+    _ran.append(True)
+    return _core().generate_titles(category, event_type, tone, num_titles, context, cost_mode)
+
+@st.cache_data(show_spinner=False, max_entries=128, ttl=3600)
+def _generate_description(title, category, event_type, tone, context, max_chars, cost_mode, _ran):
+    _ran.append(True)
+    description, logs = _core().generate_description(title, category, event_type, tone, context, max_chars, cost_mode)
+    if "error" in logs:
+        raise RuntimeError(logs["error"])
+    return description, logs
+
+def _record_cache_hit(ran):
+    # Hits here never reach smart_api_call, so count them for the analytics panel
+    if not ran:
+        _core().analytics.record_request(0, 0, 0, from_cache=True)
+
+def _titles_cached(category, event_type, tone, num_titles, context, cost_mode):
+    ran = []
+    result = _generate_titles(category, event_type, tone, num_titles, context, cost_mode, ran)
+    _record_cache_hit(ran)
+    return result
+
+def _desc_cached(title, category, event_type, tone, context, max_chars, cost_mode):
+    ran = []
+    result = _generate_description(title, category, event_type, tone, context, max_chars, cost_mode, ran)
+    _record_cache_hit(ran)
+    return result
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _cached_analytics():
+    return _core().get_global_analytics()
 
 st.title("EC-172")
 st.write("Generate event titles and descriptions with advanced context-aware prompt engineering.")
 
-def get_optimization_tip(category, event_type, tone):
-    tips = {
-        ("Technology", "Conference", "Professional"): "Technology conferences perform best with titles that emphasize innovation, future trends, and networking opportunities.",
-        ("Technology", "Workshop", "Creative"): "Creative technology workshops work best when titles suggest hands-on learning and innovation.",
-        ("Business", "Workshop", "Formal"): "Formal business workshops should highlight specific skills, ROI, and executive-level insights.",
-        ("Business", "Conference", "Professional"): "Professional business conferences perform best with titles emphasizing leadership and strategic outcomes.",
-        ("Education", "Seminar", "Creative"): "Creative education seminars work best when titles suggest transformation and hands-on learning.",
-        ("Education", "Conference", "Innovative"): "Innovative education conferences should emphasize future learning methods and technology integration.",
-        ("Health", "Workshop", "Friendly"): "Friendly health workshops perform best with approachable titles that emphasize wellness and community.",
-        ("Entertainment", "Festival", "Casual"): "Casual entertainment festivals work best with energetic titles that create excitement.",
-        ("Sports", "Conference", "Professional"): "Professional sports conferences should emphasize performance, strategy, and industry insights.",
-        ("Arts & Culture", "Exhibition", "Creative"): "Creative arts exhibitions work best with inspiring titles that evoke curiosity and artistic expression."
+_TIPS = MappingProxyType({
+    "Technology": {
+        "Conference": {"Professional": "Technology conferences perform best with titles that emphasize innovation, future trends, and networking opportunities."},
+        "Workshop": {"Creative": "Creative technology workshops work best when titles suggest hands-on learning and innovation."}
+    },
+    "Business": {
+        "Workshop": {"Formal": "Formal business workshops should highlight specific skills, ROI, and executive-level insights."},
+        "Conference": {"Professional": "Professional business conferences perform best with titles emphasizing leadership and strategic outcomes."}
+    },
+    "Education": {
+        "Seminar": {"Creative": "Creative education seminars work best when titles suggest transformation and hands-on learning."},
+        "Conference": {"Innovative": "Innovative education conferences should emphasize future learning methods and technology integration."}
+    },
+    "Health": {
+        "Workshop": {"Friendly": "Friendly health workshops perform best with approachable titles that emphasize wellness and community."}
+    },
+    "Entertainment": {
+        "Festival": {"Casual": "Casual entertainment festivals work best with energetic titles that create excitement."}
+    },
+    "Sports": {
+        "Conference": {"Professional": "Professional sports conferences should emphasize performance, strategy, and industry insights."}
+    },
+    "Arts & Culture": {
+        "Exhibition": {"Creative": "Creative arts exhibitions work best with inspiring titles that evoke curiosity and artistic expression."}
     }
-    
-    key = (category, event_type, tone)
-    if key in tips:
-        return tips[key]
+})
+
+_NO_TIPS = MappingProxyType({})
+
+_SUGGESTIONS = MappingProxyType({
+    ("Technology", "Conference"): {"tone": "Professional", "titles": 5, "desc_length": 1200},
+    ("Technology", "Workshop"): {"tone": "Creative", "titles": 4, "desc_length": 800},
+    ("Technology", "Seminar"): {"tone": "Professional", "titles": 4, "desc_length": 1000},
+    ("Technology", "Webinar"): {"tone": "Innovative", "titles": 4, "desc_length": 900},
+    ("Technology", "Festival"): {"tone": "Creative", "titles": 5, "desc_length": 1100},
+    ("Technology", "Exhibition"): {"tone": "Professional", "titles": 4, "desc_length": 1000},
+    ("Business", "Conference"): {"tone": "Professional", "titles": 5, "desc_length": 1400},
+    ("Business", "Workshop"): {"tone": "Formal", "titles": 4, "desc_length": 900},
+    ("Business", "Seminar"): {"tone": "Formal", "titles": 3, "desc_length": 1000},
+    ("Business", "Webinar"): {"tone": "Professional", "titles": 4, "desc_length": 1000},
+    ("Business", "Festival"): {"tone": "Professional", "titles": 4, "desc_length": 1200},
+    ("Business", "Exhibition"): {"tone": "Professional", "titles": 4, "desc_length": 1100},
+    ("Education", "Conference"): {"tone": "Innovative", "titles": 5, "desc_length": 1400},
+    ("Education", "Workshop"): {"tone": "Creative", "titles": 4, "desc_length": 900},
+    ("Education", "Seminar"): {"tone": "Innovative", "titles": 4, "desc_length": 1100},
+    ("Education", "Webinar"): {"tone": "Creative", "titles": 5, "desc_length": 1000},
+    ("Education", "Festival"): {"tone": "Creative", "titles": 5, "desc_length": 1200},
+    ("Education", "Exhibition"): {"tone": "Innovative", "titles": 4, "desc_length": 1000},
+    ("Health", "Conference"): {"tone": "Professional", "titles": 4, "desc_length": 1300},
+    ("Health", "Workshop"): {"tone": "Friendly", "titles": 4, "desc_length": 900},
+    ("Health", "Seminar"): {"tone": "Professional", "titles": 3, "desc_length": 800},
+    ("Health", "Webinar"): {"tone": "Friendly", "titles": 4, "desc_length": 900},
+    ("Health", "Festival"): {"tone": "Friendly", "titles": 5, "desc_length": 1100},
+    ("Health", "Exhibition"): {"tone": "Professional", "titles": 4, "desc_length": 1000},
+    ("Entertainment", "Conference"): {"tone": "Creative", "titles": 4, "desc_length": 1100},
+    ("Entertainment", "Workshop"): {"tone": "Casual", "titles": 4, "desc_length": 800},
+    ("Entertainment", "Seminar"): {"tone": "Creative", "titles": 3, "desc_length": 900},
+    ("Entertainment", "Webinar"): {"tone": "Casual", "titles": 4, "desc_length": 800},
+    ("Entertainment", "Festival"): {"tone": "Casual", "titles": 5, "desc_length": 1000},
+    ("Entertainment", "Exhibition"): {"tone": "Creative", "titles": 5, "desc_length": 1100},
+    ("Sports", "Conference"): {"tone": "Professional", "titles": 4, "desc_length": 1200},
+    ("Sports", "Workshop"): {"tone": "Professional", "titles": 4, "desc_length": 900},
+    ("Sports", "Seminar"): {"tone": "Professional", "titles": 3, "desc_length": 800},
+    ("Sports", "Webinar"): {"tone": "Professional", "titles": 4, "desc_length": 900},
+    ("Sports", "Festival"): {"tone": "Casual", "titles": 5, "desc_length": 1100},
+    ("Sports", "Exhibition"): {"tone": "Professional", "titles": 4, "desc_length": 1000},
+    ("Arts & Culture", "Conference"): {"tone": "Creative", "titles": 4, "desc_length": 1200},
+    ("Arts & Culture", "Workshop"): {"tone": "Creative", "titles": 4, "desc_length": 900},
+    ("Arts & Culture", "Seminar"): {"tone": "Creative", "titles": 3, "desc_length": 900},
+    ("Arts & Culture", "Webinar"): {"tone": "Creative", "titles": 4, "desc_length": 800},
+    ("Arts & Culture", "Festival"): {"tone": "Creative", "titles": 5, "desc_length": 1200},
+    ("Arts & Culture", "Exhibition"): {"tone": "Creative", "titles": 5, "desc_length": 1100}
+})
+
+_DEFAULT_SUGGESTION = MappingProxyType({"tone": "Professional", "titles": 3, "desc_length": 800})
+
+def get_optimization_tip(category, event_type, tone):
+    tip = _TIPS.get(category, _NO_TIPS).get(event_type, _NO_TIPS).get(tone)
+    if tip:
+        return tip
     
     return f"{tone} {event_type}s in {category} perform best when titles clearly communicate the unique value and target outcome."
 
 def suggest_optimal_settings(category, event_type):
-    suggestions = {
-        ("Technology", "Conference"): {"tone": "Professional", "titles": 5, "desc_length": 1200},
-        ("Technology", "Workshop"): {"tone": "Creative", "titles": 4, "desc_length": 800},
-        ("Technology", "Seminar"): {"tone": "Professional", "titles": 4, "desc_length": 1000},
-        ("Technology", "Webinar"): {"tone": "Innovative", "titles": 4, "desc_length": 900},
-        ("Technology", "Festival"): {"tone": "Creative", "titles": 5, "desc_length": 1100},
-        ("Technology", "Exhibition"): {"tone": "Professional", "titles": 4, "desc_length": 1000},
-        ("Business", "Conference"): {"tone": "Professional", "titles": 5, "desc_length": 1400},
-        ("Business", "Workshop"): {"tone": "Formal", "titles": 4, "desc_length": 900},
-        ("Business", "Seminar"): {"tone": "Formal", "titles": 3, "desc_length": 1000},
-        ("Business", "Webinar"): {"tone": "Professional", "titles": 4, "desc_length": 1000},
-        ("Business", "Festival"): {"tone": "Professional", "titles": 4, "desc_length": 1200},
-        ("Business", "Exhibition"): {"tone": "Professional", "titles": 4, "desc_length": 1100},
-        ("Education", "Conference"): {"tone": "Innovative", "titles": 5, "desc_length": 1400},
-        ("Education", "Workshop"): {"tone": "Creative", "titles": 4, "desc_length": 900},
-        ("Education", "Seminar"): {"tone": "Innovative", "titles": 4, "desc_length": 1100},
-        ("Education", "Webinar"): {"tone": "Creative", "titles": 5, "desc_length": 1000},
-        ("Education", "Festival"): {"tone": "Creative", "titles": 5, "desc_length": 1200},
-        ("Education", "Exhibition"): {"tone": "Innovative", "titles": 4, "desc_length": 1000},
-        ("Health", "Conference"): {"tone": "Professional", "titles": 4, "desc_length": 1300},
-        ("Health", "Workshop"): {"tone": "Friendly", "titles": 4, "desc_length": 900},
-        ("Health", "Seminar"): {"tone": "Professional", "titles": 3, "desc_length": 800},
-        ("Health", "Webinar"): {"tone": "Friendly", "titles": 4, "desc_length": 900},
-        ("Health", "Festival"): {"tone": "Friendly", "titles": 5, "desc_length": 1100},
-        ("Health", "Exhibition"): {"tone": "Professional", "titles": 4, "desc_length": 1000},
-        ("Entertainment", "Conference"): {"tone": "Creative", "titles": 4, "desc_length": 1100},
-        ("Entertainment", "Workshop"): {"tone": "Casual", "titles": 4, "desc_length": 800},
-        ("Entertainment", "Seminar"): {"tone": "Creative", "titles": 3, "desc_length": 900},
-        ("Entertainment", "Webinar"): {"tone": "Casual", "titles": 4, "desc_length": 800},
-        ("Entertainment", "Festival"): {"tone": "Casual", "titles": 5, "desc_length": 1000},
-        ("Entertainment", "Exhibition"): {"tone": "Creative", "titles": 5, "desc_length": 1100},
-        ("Sports", "Conference"): {"tone": "Professional", "titles": 4, "desc_length": 1200},
-        ("Sports", "Workshop"): {"tone": "Professional", "titles": 4, "desc_length": 900},
-        ("Sports", "Seminar"): {"tone": "Professional", "titles": 3, "desc_length": 800},
-        ("Sports", "Webinar"): {"tone": "Professional", "titles": 4, "desc_length": 900},
-        ("Sports", "Festival"): {"tone": "Casual", "titles": 5, "desc_length": 1100},
-        ("Sports", "Exhibition"): {"tone": "Professional", "titles": 4, "desc_length": 1000},
-        ("Arts & Culture", "Conference"): {"tone": "Creative", "titles": 4, "desc_length": 1200},
-        ("Arts & Culture", "Workshop"): {"tone": "Creative", "titles": 4, "desc_length": 900},
-        ("Arts & Culture", "Seminar"): {"tone": "Creative", "titles": 3, "desc_length": 900},
-        ("Arts & Culture", "Webinar"): {"tone": "Creative", "titles": 4, "desc_length": 800},
-        ("Arts & Culture", "Festival"): {"tone": "Creative", "titles": 5, "desc_length": 1200},
-        ("Arts & Culture", "Exhibition"): {"tone": "Creative", "titles": 5, "desc_length": 1100}
-    }
-    
-    key = (category, event_type)
-    return suggestions.get(key, {"tone": "Professional", "titles": 3, "desc_length": 800})
+    return _SUGGESTIONS.get((category, event_type), _DEFAULT_SUGGESTION)
 
 def get_combined_context():
-    if not st.session_state.master_context and not st.session_state.context_updates:
-        return None
-    
-    combined = st.session_state.master_context
-    if st.session_state.context_updates:
-        combined += " " + " ".join(st.session_state.context_updates)
-    
-    return combined.strip() if combined.strip() else None
+    parts = [st.session_state.master_context, *st.session_state.context_updates]
+    combined = " ".join(p for p in parts if p and p.strip())
+    return combined or None
+
+def merge_context(base, extra):
+    if extra and extra.strip():
+        return f"{base} {extra.strip()}" if base else extra.strip()
+    return base
 
 def add_context_update(new_info):
     if new_info and new_info.strip():
         st.session_state.context_updates.append(new_info.strip())
 
-def display_current_context():
-    context = get_combined_context()
+def display_current_context(context):
     if context:
         st.markdown(f'<div class="context-highlight"><strong>Current Context:</strong> {context}</div>', unsafe_allow_html=True)
     else:
@@ -177,8 +263,7 @@ def validate_form_inputs(category, event_type, tone, required_fields=None):
 
 def show_validation_errors(errors):
     if errors:
-        for error in errors:
-            st.warning(f"{error}")
+        st.warning("- " + "\n- ".join(errors))
         return True
     return False
 
@@ -191,14 +276,16 @@ def show_context_input(step_name, key_suffix=""):
         "Description Generation": "e.g., Make it more focused on sustainability, Add networking aspects, Change the target audience to executives, Include specific benefits and outcomes, Emphasize hands-on learning..."
     }
     
-    new_context = st.text_area(
-        f"Additional context for {step_name}:",
-        placeholder=context_examples.get(step_name, "Add specific details about your event..."),
-        key=f"new_context_{key_suffix}",
-        help="This context will be combined with your previous context and used for all future content generation. Be specific about your event's unique aspects!"
-    )
+    with st.form(f"context_form_{key_suffix}", clear_on_submit=False):
+        new_context = st.text_area(
+            f"Additional context for {step_name}:",
+            placeholder=context_examples.get(step_name, "Add specific details about your event..."),
+            key=f"new_context_{key_suffix}",
+            help="This context will be combined with your previous context and used for all future content generation. Be specific about your event's unique aspects!"
+        )
+        add_context_btn = st.form_submit_button(f"Add Context for {step_name}")
     
-    if st.button(f"Add Context for {step_name}", key=f"add_context_{key_suffix}"):
+    if add_context_btn:
         if new_context:
             add_context_update(new_context)
             st.success(f"Context added: {new_context}")
@@ -209,6 +296,9 @@ def show_context_input(step_name, key_suffix=""):
     return new_context
 
 def initialize_session_state():
+    if st.session_state.get("_init_done"):
+        return
+    
     session_vars = {
         'generated_titles': [],
         'final_title': "",
@@ -221,14 +311,40 @@ def initialize_session_state():
     }
     
     for var, default_value in session_vars.items():
-        if var not in st.session_state:
-            st.session_state[var] = default_value
+        st.session_state.setdefault(var, default_value)
+    st.session_state._init_done = True
 
 initialize_session_state()
 
-CATEGORY_OPTIONS = ["Select event category", "Technology", "Business", "Education", "Health", "Entertainment", "Sports", "Arts & Culture", "Other"]
-EVENT_TYPE_OPTIONS = ["Select event type", "Conference", "Workshop", "Seminar", "Webinar", "Festival", "Exhibition", "Meetup", "Other"]
-TONE_OPTIONS = ["Select tone of event", "Professional", "Casual", "Formal", "Creative", "Premium", "Innovative", "Friendly", "Corporate", "Other"]
+CATEGORY_OPTIONS = tuple(map(sys.intern, ("Select event category", "Technology", "Business", "Education", "Health", "Entertainment", "Sports", "Arts & Culture", "Other")))
+EVENT_TYPE_OPTIONS = tuple(map(sys.intern, ("Select event type", "Conference", "Workshop", "Seminar", "Webinar", "Festival", "Exhibition", "Meetup", "Other")))
+TONE_OPTIONS = tuple(map(sys.intern, ("Select tone of event", "Professional", "Casual", "Formal", "Creative", "Premium", "Innovative", "Friendly", "Corporate", "Other")))
+
+_CAT_CHOICES = CATEGORY_OPTIONS[1:-1]
+_EVENT_TYPE_CHOICES = EVENT_TYPE_OPTIONS[1:-1]
+_TONE_CHOICES = TONE_OPTIONS[1:-1]
+
+_CAT_OPTS_NO_SELECT = CATEGORY_OPTIONS[1:]
+_ET_OPTS_NO_SELECT = EVENT_TYPE_OPTIONS[1:]
+_TONE_OPTS_NO_SELECT = TONE_OPTIONS[1:]
+
+_CAT_IDX = {c: i for i, c in enumerate(_CAT_OPTS_NO_SELECT)}
+_ET_IDX = {e: i for i, e in enumerate(_ET_OPTS_NO_SELECT)}
+_TONE_IDX = {t: i for i, t in enumerate(_TONE_OPTS_NO_SELECT)}
+
+_COST_MODES = ("balanced", "economy", "premium")
+_COST_MODE_IDX = {m: i for i, m in enumerate(_COST_MODES)}
+
+ANALYTICS_METRICS = (
+    ("Total Requests", "total_requests"),
+    ("Total Cost", "total_cost"),
+    ("Avg Response Time", "avg_response_time"),
+    ("Efficiency Score", "efficiency_score"),
+    ("Cache Hit Rate", "cache_hit_rate"),
+    ("Cost Savings", "cost_savings"),
+    ("Error Rate", "error_rate"),
+    ("Total Tokens", "total_tokens")
+)
 
 st.markdown("## Context-Focused Title Generation")
 
@@ -236,14 +352,16 @@ st.markdown("## Context-Focused Title Generation")
 st.markdown("### Start with Context")
 st.markdown("**Context is the key to great results!** Provide specific details about your event to get better titles and descriptions.")
 
-initial_context = st.text_area(
-    "What's your event about? (Be specific!):",
-    placeholder="e.g., AI and machine learning conference for tech executives, focusing on networking and future trends, with hands-on workshops and keynote speakers from top tech companies...",
-    key="initial_context",
-    help="The more specific context you provide, the better your results will be. Include target audience, key themes, special features, etc."
-)
+with st.form("initial_context_form", clear_on_submit=False):
+    initial_context = st.text_area(
+        "What's your event about? (Be specific!):",
+        placeholder="e.g., AI and machine learning conference for tech executives, focusing on networking and future trends, with hands-on workshops and keynote speakers from top tech companies...",
+        key="initial_context",
+        help="The more specific context you provide, the better your results will be. Include target audience, key themes, special features, etc."
+    )
+    set_initial_context_btn = st.form_submit_button("Set Initial Context")
 
-if st.button("Set Initial Context", key="set_initial_context"):
+if set_initial_context_btn:
     if initial_context and initial_context.strip():
         st.session_state.master_context = initial_context.strip()
         st.success("Initial context set! This will be used for all generation steps.")
@@ -251,6 +369,11 @@ if st.button("Set Initial Context", key="set_initial_context"):
     else:
         st.warning("Please provide some context about your event.")
 
+# Context only changes right before an st.rerun(), so one read per run is enough
+current_context = get_combined_context()
+
+custom_title_category = custom_title_event_type = custom_title_tone = ""
+
 col1, col2, col3 = st.columns(3)
 
 with col1:
@@ -258,7 +381,7 @@ with col1:
     if title_category == "Other":
         custom_title_category = st.text_input("Custom category", key="custom_title_category")
         if custom_title_category:
-            suggestion = fuzzy_correct(custom_title_category, CATEGORY_OPTIONS[1:-1])
+            suggestion = fuzzy_correct(custom_title_category, _CAT_CHOICES)
             if suggestion != custom_title_category:
                 st.info(f"Did you mean: {suggestion}?")
 
@@ -267,7 +390,7 @@ with col2:
     if title_event_type == "Other":
         custom_title_event_type = st.text_input("Custom event type", key="custom_title_event_type")
         if custom_title_event_type:
-            suggestion = fuzzy_correct(custom_title_event_type, EVENT_TYPE_OPTIONS[1:-1])
+            suggestion = fuzzy_correct(custom_title_event_type, _EVENT_TYPE_CHOICES)
             if suggestion != custom_title_event_type:
                 st.info(f"Did you mean: {suggestion}?")
 
@@ -276,7 +399,7 @@ with col3:
     if title_tone == "Other":
         custom_title_tone = st.text_input("Custom tone", key="custom_title_tone")
         if custom_title_tone:
-            suggestion = fuzzy_correct(custom_title_tone, TONE_OPTIONS[1:-1])
+            suggestion = fuzzy_correct(custom_title_tone, _TONE_CHOICES)
             if suggestion != custom_title_tone:
                 st.info(f"Did you mean: {suggestion}?")
 
@@ -289,7 +412,7 @@ if title_category != "Select event category" and title_event_type != "Select eve
     st.info(tip)
 
 with st.form("title_form", clear_on_submit=False):
-    cost_mode = st.selectbox("Cost Optimization", ["balanced", "economy", "premium"], key="cost_mode")
+    cost_mode = st.selectbox("Cost Optimization", _COST_MODES, key="cost_mode")
     num_titles = st.slider("Number of Titles (max 5)", min_value=1, max_value=5, value=3)
     title_context = st.text_input("Additional Context for Titles (optional)", placeholder="e.g., Focus on AI and machine learning trends, target executives")
     generate_titles_btn = st.form_submit_button("Generate Titles")
@@ -304,17 +427,11 @@ if generate_titles_btn:
     if show_validation_errors(validation_errors):
         st.stop()
     
-    # Combine context
-    combined_context = get_combined_context()
-    if title_context and title_context.strip():
-        if combined_context:
-            combined_context += " " + title_context.strip()
-        else:
-            combined_context = title_context.strip()
+    combined_context = merge_context(current_context, title_context)
     
     with st.spinner("Generating context-aware titles with advanced prompt engineering..."):
         try:
-            titles, logs = generate_titles(
+            titles, logs = _titles_cached(
                 final_category,
                 final_event_type,
                 final_tone,
@@ -323,49 +440,45 @@ if generate_titles_btn:
                 cost_mode
             )
             st.session_state.generated_titles = titles
+            st.session_state._title_options = ["Select a title option...", *[f"Use: {title}" for title in titles], "Write my own custom title"]
+            st.session_state._titles_blob = "\n".join(titles).encode("utf-8")
             st.session_state.title_logs = logs
         except Exception as e:
             st.error(f"Error generating titles: {str(e)}")
             st.error("Please try again or check your API key.")
 
-if st.session_state.get("generated_titles"):
+generated_titles = st.session_state.get("generated_titles")
+if generated_titles:
+    title_logs = st.session_state.title_logs
     st.markdown("### Generated Titles:")
-    for i, title in enumerate(st.session_state.generated_titles, 1):
-        st.markdown(f'<div style="background: #f8f9fa; padding: 1rem; border-radius: 8px; border-left: 4px solid #2563eb; color: #333; margin-bottom: 0.5rem;">{i}. {title}</div>', unsafe_allow_html=True)
-    st.download_button("Download Titles", "\n".join(st.session_state.generated_titles), file_name="event_titles.txt", mime="text/plain", key="download_titles_btn")
+    title_cards = "".join(f'<div class="title-card">{i}. {html.escape(title)}</div>' for i, title in enumerate(generated_titles, 1))
+    st.markdown(title_cards, unsafe_allow_html=True)
+    st.download_button("Download Titles", st.session_state._titles_blob, file_name="event_titles.txt", mime="text/plain", key="download_titles_btn")
     
-    display_current_context()
+    display_current_context(current_context)
     show_context_input("Title Generation", "titles")
     
-    if st.session_state.title_logs:
+    if title_logs:
         show_title_analytics = st.button("View Title Generation Analytics", key="title_analytics_btn")
         if show_title_analytics:
             st.markdown("### Title Generation Analytics")
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Prompt Tokens", st.session_state.title_logs.get('Prompt tokens', 'N/A'))
-                st.metric("Total Tokens", st.session_state.title_logs.get('Total tokens', 'N/A'))
+                st.metric("Prompt Tokens", title_logs.get('Prompt tokens', 'N/A'))
+                st.metric("Total Tokens", title_logs.get('Total tokens', 'N/A'))
             with col2:
-                st.metric("Completion Tokens", st.session_state.title_logs.get('Completion tokens', 'N/A'))
-                st.metric("Generation Time", f"{st.session_state.title_logs.get('Time taken (s)', 'N/A')}s")
-            st.metric("Cost", st.session_state.title_logs.get('Estimated cost ($)', 'N/A'))
-            st.markdown(f"**Model Used:** {st.session_state.title_logs.get('Model', 'gpt-3.5-turbo')}")
+                st.metric("Completion Tokens", title_logs.get('Completion tokens', 'N/A'))
+                st.metric("Generation Time", f"{title_logs.get('Time taken (s)', 'N/A')}s")
+            st.metric("Cost", title_logs.get('Estimated cost ($)', 'N/A'))
+            st.markdown(f"**Model Used:** {title_logs.get('Model', 'gpt-3.5-turbo')}")
             with st.expander("Show Prompt Preview"):
-                st.markdown(f"""
-**System Prompt:**
-```
-{st.session_state.title_logs.get('System prompt', '')}
-```
-**User Prompt:**
-```
-{st.session_state.title_logs.get('User prompt', '')}
-```
-""", unsafe_allow_html=True)
+                st.markdown("**System Prompt:**")
+                st.code(title_logs.get('System prompt', ''), language="text")
+                st.markdown("**User Prompt:**")
+                st.code(title_logs.get('User prompt', ''), language="text")
     
     st.markdown("### Select or Create Your Title:")
-    title_options = ["Select a title option..."] + [f"Use: {title}" for title in st.session_state.generated_titles] + ["Write my own custom title"]
-    
-    title_choice = st.selectbox("Choose how you want to proceed:", title_options, key="title_choice")
+    title_choice = st.selectbox("Choose how you want to proceed:", st.session_state._title_options, key="title_choice")
     
     if title_choice.startswith("Use: "):
         selected_generated_title = title_choice[5:]
@@ -391,8 +504,8 @@ if st.session_state.get("generated_titles"):
                                    placeholder="Enter your custom event title...", 
                                    key="custom_title_input")
         if custom_title:
-            suggestion = fuzzy_correct(custom_title, st.session_state.generated_titles)
-            if suggestion != custom_title and suggestion in st.session_state.generated_titles:
+            suggestion = fuzzy_correct(custom_title, generated_titles)
+            if suggestion != custom_title and suggestion in generated_titles:
                 st.info(f"Did you mean one of our generated titles: **{suggestion}**?")
                 use_suggestion = st.checkbox(f"Use '{suggestion}' instead?", key="use_fuzzy_suggestion")
                 if use_suggestion:
@@ -415,20 +528,22 @@ if st.session_state.get("final_title"):
         help="Choose whether to use the selected title and previous settings or enter custom parameters."
     )
     
+    custom_desc_category = custom_desc_event_type = custom_desc_tone = ""
+    
     with st.form("description_form", clear_on_submit=False):
         if desc_use_same == "Use same title and settings as above":
             desc_title = st.text_input("Title for Description", value=st.session_state.final_title, key="desc_title_input", disabled=True)
-            desc_category = st.selectbox("Category for Description", ["Technology", "Business", "Education", "Health", "Entertainment", "Sports", "Arts & Culture", "Other"], 
-                                       index=max(0, ["Technology", "Business", "Education", "Health", "Entertainment", "Sports", "Arts & Culture", "Other"].index(title_category) if title_category != "Select event category" else 0), 
+            desc_category = st.selectbox("Category for Description", _CAT_OPTS_NO_SELECT, 
+                                       index=_CAT_IDX.get(title_category, 0), 
                                        key="desc_category", disabled=True)
-            desc_event_type = st.selectbox("Event Type for Description", ["Conference", "Workshop", "Seminar", "Webinar", "Festival", "Exhibition", "Meetup", "Other"],
-                                         index=max(0, ["Conference", "Workshop", "Seminar", "Webinar", "Festival", "Exhibition", "Meetup", "Other"].index(title_event_type) if title_event_type != "Select event type" else 0),
+            desc_event_type = st.selectbox("Event Type for Description", _ET_OPTS_NO_SELECT,
+                                         index=_ET_IDX.get(title_event_type, 0),
                                          key="desc_event_type", disabled=True)
-            desc_tone = st.selectbox("Tone for Description", ["Professional", "Casual", "Formal", "Creative", "Premium", "Innovative", "Friendly", "Corporate", "Other"],
-                                   index=max(0, ["Professional", "Casual", "Formal", "Creative", "Premium", "Innovative", "Friendly", "Corporate", "Other"].index(title_tone) if title_tone != "Select tone of event" else 0),
+            desc_tone = st.selectbox("Tone for Description", _TONE_OPTS_NO_SELECT,
+                                   index=_TONE_IDX.get(title_tone, 0),
                                    key="desc_tone", disabled=True)
-            desc_context = st.text_input("Context for Description (optional)", value=get_combined_context() or "", key="desc_context", disabled=True)
-            desc_cost_mode = st.selectbox("Description Cost Mode", ["balanced", "economy", "premium"], index=["balanced", "economy", "premium"].index(cost_mode), key="desc_cost_mode", disabled=True)
+            desc_context = st.text_input("Context for Description (optional)", value=current_context or "", key="desc_context", disabled=True)
+            desc_cost_mode = st.selectbox("Description Cost Mode", _COST_MODES, index=_COST_MODE_IDX.get(cost_mode, 0), key="desc_cost_mode", disabled=True)
         else:
             desc_title = st.text_input("Title for Description", value=st.session_state.final_title, key="desc_title_input_custom")
             
@@ -438,7 +553,7 @@ if st.session_state.get("final_title"):
                 if desc_category == "Other":
                     custom_desc_category = st.text_input("Custom category", key="custom_desc_category")
                     if custom_desc_category:
-                        suggestion = fuzzy_correct(custom_desc_category, CATEGORY_OPTIONS[1:-1])
+                        suggestion = fuzzy_correct(custom_desc_category, _CAT_CHOICES)
                         if suggestion != custom_desc_category:
                             st.info(f"Did you mean: {suggestion}?")
             
@@ -447,7 +562,7 @@ if st.session_state.get("final_title"):
                 if desc_event_type == "Other":
                     custom_desc_event_type = st.text_input("Custom event type", key="custom_desc_event_type")
                     if custom_desc_event_type:
-                        suggestion = fuzzy_correct(custom_desc_event_type, EVENT_TYPE_OPTIONS[1:-1])
+                        suggestion = fuzzy_correct(custom_desc_event_type, _EVENT_TYPE_CHOICES)
                         if suggestion != custom_desc_event_type:
                             st.info(f"Did you mean: {suggestion}?")
             
@@ -456,12 +571,12 @@ if st.session_state.get("final_title"):
                 if desc_tone == "Other":
                     custom_desc_tone = st.text_input("Custom tone", key="custom_desc_tone")
                     if custom_desc_tone:
-                        suggestion = fuzzy_correct(custom_desc_tone, TONE_OPTIONS[1:-1])
+                        suggestion = fuzzy_correct(custom_desc_tone, _TONE_CHOICES)
                         if suggestion != custom_desc_tone:
                             st.info(f"Did you mean: {suggestion}?")
             
             desc_context = st.text_input("Context for Description (optional)", value="", key="desc_context_custom")
-            desc_cost_mode = st.selectbox("Description Cost Mode", ["balanced", "economy", "premium"], key="desc_cost_mode_custom")
+            desc_cost_mode = st.selectbox("Description Cost Mode", _COST_MODES, key="desc_cost_mode_custom")
         
         max_chars = st.slider("Description Length (characters)", min_value=100, max_value=5000, value=800)
         generate_desc_btn = st.form_submit_button("Generate Description")
@@ -476,17 +591,11 @@ if st.session_state.get("final_title"):
             final_desc_event_type = desc_event_type
             final_desc_tone = desc_tone
         
-        # Combine context for description
-        combined_context = get_combined_context()
-        if desc_context and desc_context.strip():
-            if combined_context:
-                combined_context += " " + desc_context.strip()
-            else:
-                combined_context = desc_context.strip()
+        combined_context = merge_context(current_context, desc_context)
         
         with st.spinner("Generating context-aware description with advanced prompt engineering..."):
             try:
-                description, logs = generate_description(
+                description, logs = _desc_cached(
                     desc_title,
                     final_desc_category,
                     final_desc_event_type,
@@ -501,124 +610,133 @@ if st.session_state.get("final_title"):
                 st.error(f"Error generating description: {str(e)}")
                 st.error("Please try again or check your API key.")
 
-    if st.session_state.get("description"):
+    generated_description = st.session_state.get("description")
+    if generated_description:
+        desc_logs = st.session_state.desc_logs
         st.markdown("### Generated Description:")
-        st.markdown(f'<div class="description-box">{st.session_state.description}</div>', unsafe_allow_html=True)
-        st.info(f"Description length: {len(st.session_state.description)} characters")
-        st.download_button("Download as .txt", st.session_state.description, file_name="event_description.txt", mime="text/plain", key="download_desc_btn")
+        st.markdown(f'<div class="description-box">{generated_description}</div>', unsafe_allow_html=True)
+        st.info(f"Description length: {len(generated_description)} characters")
+        st.download_button("Download as .txt", generated_description, file_name="event_description.txt", mime="text/plain", key="download_desc_btn")
         
-        display_current_context()
+        display_current_context(current_context)
         show_context_input("Description Generation", "description")
         
-        if st.session_state.desc_logs:
+        if desc_logs:
             show_desc_analytics = st.button("View Description Generation Analytics", key="desc_analytics_btn")
             if show_desc_analytics:
                 st.markdown("### Description Generation Analytics")
                 col1, col2 = st.columns(2)
                 with col1:
-                    st.metric("Prompt Tokens", st.session_state.desc_logs.get('Prompt tokens', 'N/A'))
-                    st.metric("Total Tokens", st.session_state.desc_logs.get('Total tokens', 'N/A'))
+                    st.metric("Prompt Tokens", desc_logs.get('Prompt tokens', 'N/A'))
+                    st.metric("Total Tokens", desc_logs.get('Total tokens', 'N/A'))
                 with col2:
-                    st.metric("Completion Tokens", st.session_state.desc_logs.get('Completion tokens', 'N/A'))
-                    st.metric("Generation Time", f"{st.session_state.desc_logs.get('Time taken (s)', 'N/A')}s")
-                st.metric("Cost", st.session_state.desc_logs.get('Estimated cost ($)', 'N/A'))
-                st.markdown(f"**Model Used:** {st.session_state.desc_logs.get('model', 'gpt-3.5-turbo')}")
+                    st.metric("Completion Tokens", desc_logs.get('Completion tokens', 'N/A'))
+                    st.metric("Generation Time", f"{desc_logs.get('Time taken (s)', 'N/A')}s")
+                st.metric("Cost", desc_logs.get('Estimated cost ($)', 'N/A'))
+                st.markdown(f"**Model Used:** {desc_logs.get('model', 'gpt-3.5-turbo')}")
                 
         st.markdown("### Use This Description:")
         desc_options = ["Use generated description", "Edit generated description", "Write my own description"]
         desc_choice = st.selectbox("Choose how you want to proceed:", desc_options, key="desc_choice")
         
         if desc_choice == "Use generated description":
-            st.session_state.final_description = st.session_state.description
-            st.success(f"Using generated description ({len(st.session_state.description)} characters)")
+            st.session_state.final_description = generated_description
+            st.success(f"Using generated description ({len(generated_description)} characters)")
         elif desc_choice == "Edit generated description":
             edited_desc = st.text_area("Edit the description:", 
-                                     value=st.session_state.description, 
+                                     value=generated_description, 
                                      key="edit_desc", height=150)
             if edited_desc:
                 st.session_state.final_description = edited_desc
                 st.success(f"Using edited description ({len(edited_desc)} characters)")
         else:
-            custom_desc = st.text_area("Write your own description:", 
-                                     placeholder="Enter your custom event description...", 
-                                     key="custom_desc", height=150)
-            if custom_desc:
-                st.session_state.final_description = custom_desc
+            with st.form("custom_desc_form", clear_on_submit=False):
+                custom_desc = st.text_area("Write your own description:", 
+                                         placeholder="Enter your custom event description...", 
+                                         key="custom_desc_draft", height=150)
+                use_custom_desc_btn = st.form_submit_button("Use this description")
+            
+            if use_custom_desc_btn:
+                if custom_desc:
+                    st.session_state.final_description = custom_desc
+                else:
+                    st.warning("Please write a description to use.")
+            
+            if custom_desc and st.session_state.final_description == custom_desc:
                 st.success(f"Using custom description ({len(custom_desc)} characters)")
 
-content_complete = (
-    st.session_state.get("final_title") and 
-    st.session_state.get("final_description")
-)
+final_title = st.session_state.get("final_title")
+final_description = st.session_state.get("final_description")
+content_complete = bool(final_title and final_description)
 
-if content_complete:
-    st.markdown("---")
-    st.markdown("## Complete Event Package")
-    
-    st.markdown("---")
-    
-    st.markdown("# EVENT SUMMARY")
-    st.markdown("---")
-    
-    st.markdown("## TITLE")
-    st.markdown(f"**{st.session_state.final_title}**")
-    st.markdown("---")
-    
-    st.markdown("## DESCRIPTION")
-    st.markdown(st.session_state.final_description)
-    
-    st.markdown("---")
+@st.fragment
+def render_event_package(title, description):
+    st.markdown(
+        "---\n\n## Complete Event Package\n\n---\n\n# EVENT SUMMARY\n\n---\n\n"
+        f"## TITLE\n\n**{title}**\n\n---\n\n"
+        f"## DESCRIPTION\n\n{description}\n\n---"
+    )
     
-    summary_text = f"""EVENT SUMMARY
-
-TITLE:
-{st.session_state.final_title}
-
-DESCRIPTION:
-{st.session_state.final_description}
-"""
+    summary_key = (title, description)
+    if st.session_state.get("_summary_key") != summary_key:
+        st.session_state._summary_bytes = ("EVENT SUMMARY\n\nTITLE:\n" + title + "\n\nDESCRIPTION:\n" + description + "\n").encode("utf-8")
+        st.session_state._summary_key = summary_key
     
     st.download_button(
         "Download Complete Event Summary", 
-        summary_text, 
+        st.session_state._summary_bytes, 
         file_name="complete_event_summary.txt", 
         mime="text/plain", 
         key="download_complete_summary_btn"
     )
 
-st.markdown("---")
-
-with st.expander("System Performance Analytics", expanded=False):
-    st.markdown("### Global Performance Metrics")
-    
-    try:
-        analytics_data = get_global_analytics()
-        
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("Total Requests", analytics_data["total_requests"])
-            st.metric("Cache Hit Rate", analytics_data["cache_hit_rate"])
-        with col2:
-            st.metric("Total Cost", analytics_data["total_cost"])
-            st.metric("Cost Savings", analytics_data["cost_savings"])
-        with col3:
-            st.metric("Avg Response Time", analytics_data["avg_response_time"])
-            st.metric("Error Rate", analytics_data["error_rate"])
-        with col4:
-            st.metric("Efficiency Score", analytics_data["efficiency_score"])
-            st.metric("Total Tokens", analytics_data["total_tokens"])
+# Fixed containers keep the analytics panel at the same element path
+# whether or not the event package is shown
+package_container = st.container()
+analytics_container = st.container()
+
+with package_container:
+    if content_complete:
+        render_event_package(final_title, final_description)
+
+def reset_analytics_callback():
+    # Runs before the click's rerun, so the panel renders fresh data without a second rerun
+    _core().reset_analytics()
+    _cached_analytics.clear()
+    st.session_state._analytics_reset_flash = True
+
+@st.fragment
+def analytics_fragment():
+    with st.expander("System Performance Analytics", expanded=False):
+        if st.session_state.pop("_analytics_reset_flash", False):
+            st.toast("Analytics reset successfully!")
+        st.markdown("### Global Performance Metrics")
         
-        st.markdown("### Optimization Recommendations")
-        for rec in analytics_data["recommendations"]:
-            st.info(f"• {rec}")
+        # Analytics live in event_llm_core; don't import it just to report zeros
+        if "event_llm_core" not in sys.modules:
+            st.info("No requests recorded yet. Analytics will appear after your first generation.")
+            return
         
-        if st.button("Reset Analytics", key="reset_analytics"):
-            reset_analytics()
-            st.success("Analytics reset successfully!")
-            st.rerun()
+        try:
+            analytics_data = _cached_analytics()
             
-    except Exception as e:
-        st.error(f"Analytics unavailable: {str(e)}")
+            analytics_sig = tuple(analytics_data[key] for _, key in ANALYTICS_METRICS)
+            if st.session_state.get("_analytics_sig") != analytics_sig:
+                metric_cells = "".join(f'<div><span>{label}</span><b>{value}</b></div>' for (label, _), value in zip(ANALYTICS_METRICS, analytics_sig))
+                st.session_state._analytics_html = f'<div class="metrics-grid">{metric_cells}</div>'
+                st.session_state._analytics_sig = analytics_sig
+            st.markdown(st.session_state._analytics_html, unsafe_allow_html=True)
+            
+            st.markdown("### Optimization Recommendations")
+            st.info("\n\n".join(f"• {rec}" for rec in analytics_data["recommendations"]))
+            
+            st.button("Reset Analytics", key="reset_analytics", on_click=reset_analytics_callback)
+            
+        except Exception as e:
+            st.error(f"Analytics unavailable: {str(e)}")
+
+with analytics_container:
+    st.markdown("---")
+    analytics_fragment()
 
-st.markdown("---")
-st.markdown("**Context-Focused:** Advanced context-aware generation with intelligent prompt engineering for superior results.")
\ No newline at end of file
+st.markdown("---\n\n**Context-Focused:** Advanced context-aware generation with intelligent prompt engineering for superior results.")
\ No newline at end of file
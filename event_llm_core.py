@@ -1,14 +1,17 @@
-import json
+import orjson
+import re
 import os
 import time
 import hashlib
-import pickle
-from datetime import datetime, timedelta
+from datetime import timedelta
 from dotenv import load_dotenv
-from difflib import get_close_matches
-import streamlit as st
-from openai import OpenAI
+from fuzzy_match import fuzzy_correct
+from openai import OpenAI, RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
+import httpx
 import random
+import threading
+import diskcache
+from functools import lru_cache
 
 load_dotenv()
 
@@ -16,56 +19,21 @@ class SmartCache:
     def __init__(self, cache_dir="cache", ttl_hours=48):
         self.cache_dir = cache_dir
         self.ttl = timedelta(hours=ttl_hours)
-        self.memory_cache = {}
-        self.max_memory_items = 100
-        if not os.path.exists(cache_dir):
-            os.makedirs(cache_dir)
+        self.cache = diskcache.Cache(cache_dir, size_limit=int(1e9))
     
-    def _get_cache_key(self, *args, **kwargs):
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _get_cache_key(*args, **kwargs):
         content = str(args) + str(sorted(kwargs.items()))
         return hashlib.md5(content.encode()).hexdigest()[:16]
     
     def get(self, key):
-        if key in self.memory_cache:
-            data = self.memory_cache[key]
-            if datetime.now() - data['timestamp'] < self.ttl:
-                return data['content']
-            else:
-                del self.memory_cache[key]
-        
-        cache_file = os.path.join(self.cache_dir, f"{key}.pkl")
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'rb') as f:
-                    data = pickle.load(f)
-                if datetime.now() - data['timestamp'] < self.ttl:
-                    if len(self.memory_cache) < self.max_memory_items:
-                        self.memory_cache[key] = data
-                    return data['content']
-                else:
-                    os.remove(cache_file)
-            except:
-                pass
-        return None
+        return self.cache.get(key)
     
     def set(self, key, content):
-        data = {
-            'content': content,
-            'timestamp': datetime.now()
-        }
-        
-        if len(self.memory_cache) >= self.max_memory_items:
-            oldest_key = min(self.memory_cache.keys(), key=lambda k: self.memory_cache[k]['timestamp'])
-            del self.memory_cache[oldest_key]
-        
-        self.memory_cache[key] = data
-        
-        cache_file = os.path.join(self.cache_dir, f"{key}.pkl")
-        try:
-            with open(cache_file, 'wb') as f:
-                pickle.dump(data, f)
-        except:
-            pass
+        self.cache.set(key, content, expire=self.ttl.total_seconds())
+
+_ESSENTIAL_RE = re.compile(r'\b(CRITICAL|MUST|REQUIRED|ESSENTIAL)\b', re.IGNORECASE)
 
 class PromptOptimizer:
     @staticmethod
@@ -73,13 +41,16 @@ class PromptOptimizer:
         lines = prompt.split('\n')
         essential_lines = []
         for line in lines:
-            if any(keyword in line.upper() for keyword in ['CRITICAL', 'MUST', 'REQUIRED', 'ESSENTIAL']):
+            if _ESSENTIAL_RE.search(line):
                 essential_lines.append(line)
-            elif len(line.strip()) > 10 and not line.strip().startswith('-'):
+                continue
+            stripped = line.strip()
+            if len(stripped) > 10 and not stripped.startswith('-'):
                 essential_lines.append(line[:int(len(line) * (1 - target_reduction))])
         return '\n'.join(essential_lines)
     
     @staticmethod
+    @lru_cache(maxsize=1024)
     def optimize_for_cost(prompt, cost_mode):
         if cost_mode == "economy":
             compressed = PromptOptimizer.compress_prompt(prompt, 0.5)
@@ -110,22 +81,27 @@ class PerformanceAnalytics:
             'total_cost': 0.0,
             'total_tokens': 0,
             'avg_response_time': 0.0,
-            'error_rate': 0.0
+            'error_rate': 0.0,
+            'total_response_time': 0.0,
+            'error_count': 0
         }
+        self._lock = threading.Lock()
     
     def record_request(self, cost, tokens, response_time, from_cache=False, error=False):
-        self.metrics['total_requests'] += 1
-        if from_cache:
-            self.metrics['cache_hits'] += 1
-        else:
-            self.metrics['total_cost'] += cost
-            self.metrics['total_tokens'] += tokens
-        
-        current_avg = self.metrics['avg_response_time']
-        self.metrics['avg_response_time'] = (current_avg * (self.metrics['total_requests'] - 1) + response_time) / self.metrics['total_requests']
-        
-        if error:
-            self.metrics['error_rate'] = (self.metrics['error_rate'] * (self.metrics['total_requests'] - 1) + 1) / self.metrics['total_requests']
+        with self._lock:
+            self.metrics['total_requests'] += 1
+            if from_cache:
+                self.metrics['cache_hits'] += 1
+            else:
+                self.metrics['total_cost'] += cost
+                self.metrics['total_tokens'] += tokens
+            
+            self.metrics['total_response_time'] += response_time
+            if error:
+                self.metrics['error_count'] += 1
+            
+            self.metrics['avg_response_time'] = self.metrics['total_response_time'] / self.metrics['total_requests']
+            self.metrics['error_rate'] = self.metrics['error_count'] / self.metrics['total_requests']
     
     def get_efficiency_score(self):
         if self.metrics['total_requests'] == 0:
@@ -150,25 +126,25 @@ class PerformanceAnalytics:
 cache = SmartCache()
 analytics = PerformanceAnalytics()
 
-def get_api_key():
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key and 'st' in globals():
-        try:
-            api_key = st.secrets["OPENAI_API_KEY"]
-        except:
-            pass
-    return api_key
+def _streamlit_secret(name):
+    try:
+        import streamlit as st
+        return st.secrets[name]
+    except Exception:
+        return None
 
-API_KEY = get_api_key()
+API_KEY = os.getenv("OPENAI_API_KEY") or _streamlit_secret("OPENAI_API_KEY")
 
+# app.py turns this into its configuration error page; CLI services see the exception
 if not API_KEY:
-    if 'st' in globals():
-        st.error("OpenAI API key not found! Please add OPENAI_API_KEY to your Streamlit secrets.")
-        st.stop()
-    else:
-        raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY environment variable or add to Streamlit secrets.")
+    raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY environment variable or add to Streamlit secrets.")
+
+# One pooled HTTP/2 client for every request; OpenAI keeps its default timeout
+_http_client = httpx.Client(http2=True, limits=httpx.Limits(max_keepalive_connections=20, max_connections=40))
+client = OpenAI(api_key=API_KEY, http_client=_http_client)
 
-client = OpenAI(api_key=API_KEY)
+_JSON_CHARS = str.maketrans('', '', '[]"')
+_TITLE_STRIP = re.compile(r'^[\s\-"\'\d.]+|[\s\-"\'\d.]+$')
 
 def clean_json_output(raw):
     raw = raw.strip()
@@ -180,6 +156,7 @@ def clean_json_output(raw):
         raw = raw[:-3].strip()
     return raw
 
+@lru_cache(maxsize=4096)
 def estimate_cost(prompt_tokens, completion_tokens, model="gpt-3.5-turbo"):
     costs = {
         "gpt-3.5-turbo": {"input": 0.0005, "output": 0.0015},
@@ -192,72 +169,158 @@ def estimate_cost(prompt_tokens, completion_tokens, model="gpt-3.5-turbo"):
         return input_cost + output_cost
     return 0.02
 
+@lru_cache(maxsize=1)
+def _encoder():
+    # Loaded on first use: get_encoding may download the BPE file
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+@lru_cache(maxsize=4096)
 def count_tokens(text):
+    enc = _encoder()
+    if enc is not None:
+        return len(enc.encode(text))
     return max(len(text.split()), int(len(text) / 3.5))
 
-def fuzzy_correct(user_input, valid_options):
-    matches = get_close_matches(user_input, valid_options, n=1, cutoff=0.75)
-    if matches:
-        return matches[0]
-    return user_input
+_in_flight = {}
+_in_flight_lock = threading.Lock()
 
-def smart_api_call(system_msg, user_msg, max_tokens, temperature, model="gpt-3.5-turbo", cost_mode="balanced"):
-    start_time = time.time()
-    
+RETRIABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+def _retry_delay(error, attempt):
+    response = getattr(error, 'response', None)
+    if response is not None:
+        try:
+            return min(float(response.headers.get('retry-after')), 30.0)
+        except (TypeError, ValueError):
+            pass
+    return (2 ** attempt) + random.uniform(0, 0.5)
+
+@lru_cache(maxsize=1024)
+def _prepare_call(system_msg, user_msg, cost_mode, max_tokens, temperature, model):
     optimized_system = PromptOptimizer.optimize_for_cost(system_msg, cost_mode)
     optimized_user = PromptOptimizer.optimize_for_cost(user_msg, cost_mode)
+    # Hash the prompts in place rather than through a repr() of all arguments
+    digest = hashlib.md5(optimized_system.encode())
+    digest.update(b"\0")
+    digest.update(optimized_user.encode())
+    digest.update(f"\0{max_tokens}\0{temperature}\0{model}".encode())
+    return optimized_system, optimized_user, digest.hexdigest()[:16]
+
+def smart_api_call(system_msg, user_msg, max_tokens, temperature, model="gpt-3.5-turbo", cost_mode="balanced"):
+    start_time = time.time()
     
-    cache_key = cache._get_cache_key(optimized_system, optimized_user, max_tokens, temperature, model)
+    optimized_system, optimized_user, cache_key = _prepare_call(system_msg, user_msg, cost_mode, max_tokens, temperature, model)
     cached_result = cache.get(cache_key)
     
     if cached_result:
         analytics.record_request(0, 0, time.time() - start_time, from_cache=True)
         return cached_result
     
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": optimized_system},
-                    {"role": "user", "content": optimized_user}
-                ],
-                max_tokens=max_tokens,
-                temperature=temperature,
-                top_p=0.9,
-                frequency_penalty=0.6,
-                presence_penalty=0.4
-            )
-            
-            result = response.choices[0].message.content.strip()
-            cache.set(cache_key, result)
-            
-            prompt_tokens = count_tokens(optimized_system + optimized_user)
-            completion_tokens = count_tokens(result)
-            cost = estimate_cost(prompt_tokens, completion_tokens, model)
-            
-            analytics.record_request(cost, prompt_tokens + completion_tokens, time.time() - start_time)
-            return result
-            
-        except Exception as e:
-            if attempt == max_retries - 1:
+    # Identical concurrent requests wait for the first caller instead of hitting the API again
+    with _in_flight_lock:
+        in_flight = _in_flight.get(cache_key)
+        is_leader = in_flight is None
+        if is_leader:
+            in_flight = _in_flight[cache_key] = threading.Event()
+    
+    if not is_leader:
+        in_flight.wait()
+        cached_result = cache.get(cache_key)
+        if cached_result:
+            analytics.record_request(0, 0, time.time() - start_time, from_cache=True)
+            return cached_result
+    
+    try:
+        if is_leader:
+            # A previous leader may have stored the result between our cache miss and taking the lock
+            cached_result = cache.get(cache_key)
+            if cached_result:
+                analytics.record_request(0, 0, time.time() - start_time, from_cache=True)
+                return cached_result
+        
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": optimized_system},
+                        {"role": "user", "content": optimized_user}
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    top_p=0.9,
+                    frequency_penalty=0.6,
+                    presence_penalty=0.4
+                )
+                
+                result = response.choices[0].message.content.strip()
+                if response.usage:
+                    usage = {'prompt_tokens': response.usage.prompt_tokens, 'completion_tokens': response.usage.completion_tokens}
+                else:
+                    usage = {'prompt_tokens': count_tokens(optimized_system + optimized_user), 'completion_tokens': count_tokens(result)}
+                cache.set(cache_key, (result, usage))
+                
+                cost = estimate_cost(usage['prompt_tokens'], usage['completion_tokens'], model)
+                
+                analytics.record_request(cost, usage['prompt_tokens'] + usage['completion_tokens'], time.time() - start_time)
+                return result, usage
+                
+            except RETRIABLE_ERRORS as e:
+                if attempt == max_retries - 1:
+                    analytics.record_request(0, 0, time.time() - start_time, error=True)
+                    raise e
+                time.sleep(_retry_delay(e, attempt))
+            except Exception:
                 analytics.record_request(0, 0, time.time() - start_time, error=True)
-                raise e
-            time.sleep(2 ** attempt)
+                raise
+    finally:
+        if is_leader:
+            with _in_flight_lock:
+                del _in_flight[cache_key]
+            in_flight.set()
 
+@lru_cache(maxsize=4096)
 def get_title_examples(category, event_type, tone):
     examples = {
-        ("Technology", "Conference", "Professional"): ["Tech Leadership Summit", "Digital Innovation Forum", "Future Systems Expo"],
-        ("Technology", "Workshop", "Creative"): ["Code & Create Lab", "Innovation Studio", "Digital Makers Hub"],
-        ("Business", "Conference", "Professional"): ["Business Growth Summit", "Leadership Excellence Forum", "Strategic Success Conference"],
-        ("Business", "Seminar", "Formal"): ["Executive Mastery Series", "Strategic Leadership Institute", "Business Excellence Summit"],
-        ("Education", "Conference", "Innovative"): ["Learning Revolution Summit", "Educational Innovation Forum", "Teaching Excellence Expo"]
+        ("Technology", "Conference", "Professional"): ("Tech Leadership Summit", "Digital Innovation Forum", "Future Systems Expo"),
+        ("Technology", "Workshop", "Creative"): ("Code & Create Lab", "Innovation Studio", "Digital Makers Hub"),
+        ("Business", "Conference", "Professional"): ("Business Growth Summit", "Leadership Excellence Forum", "Strategic Success Conference"),
+        ("Business", "Seminar", "Formal"): ("Executive Mastery Series", "Strategic Leadership Institute", "Business Excellence Summit"),
+        ("Education", "Conference", "Innovative"): ("Learning Revolution Summit", "Educational Innovation Forum", "Teaching Excellence Expo")
     }
     key = (category, event_type, tone)
     if key in examples:
         return examples[key]
-    return [f"{category} Excellence Summit", f"{event_type} Innovation Forum", f"Advanced {category} Workshop"]
+    return (f"{category} Excellence Summit", f"{event_type} Innovation Forum", f"Advanced {category} Workshop")
+
+@lru_cache(maxsize=512)
+def _creative_fallbacks(category, event_type, tone):
+    candidates = (
+        f"{category} Excellence Summit",
+        f"Future of {category}",
+        f"{tone} {event_type} Experience",
+        f"Next-Gen {category} Forum",
+        f"Advanced {event_type} Series",
+        f"{category} Innovation Hub",
+        f"Premier {event_type} Event",
+        f"{tone} {category} Gathering",
+        f"Professional {event_type} Network",
+        f"Elite {category} Conference"
+    )
+    return tuple((c, c.lower()) for c in candidates if 3 <= len(c.split()) <= 6)
+
+def _add_unique(title, titles, seen, key=None):
+    key = key or title.lower()
+    if key in seen:
+        return False
+    titles.append(title)
+    seen.add(key)
+    return True
 
 def validate_inputs(category, event_type, tone, num_titles=3, context=None):
     errors = []
@@ -274,32 +337,23 @@ def validate_inputs(category, event_type, tone, num_titles=3, context=None):
         warnings.append("Context is very long - may increase costs")
     return errors, warnings
 
-def generate_titles(category, event_type, tone, num_titles=5, context=None, cost_mode="balanced"):
-    errors, warnings = validate_inputs(category, event_type, tone, num_titles, context)
-    if errors:
-        return [], {"errors": errors, "warnings": warnings}
-    
-    num_titles = max(1, min(int(num_titles), 5))
-    diversity_instruction = "Each title must be unique, creative, and use different wording. Avoid repeating phrases or structures. No emojis or decorative symbols."
-    
-    # Enhanced context handling
-    context_str = ""
-    if context and context.strip():
-        context_str = f"\n\nCRITICAL CONTEXT REQUIREMENTS:\n- Incorporate the following specific context: {context.strip()}\n- Ensure titles reflect the unique aspects mentioned in the context\n- Use context details to create more targeted and relevant titles\n- Make titles specific to the context provided\n- Avoid generic titles that don't reflect the context"
-    
-    if cost_mode == "economy":
-        system_msg = f"Generate {num_titles} creative, unique {tone.lower()} event titles for {category} {event_type}. 3-6 words each, no colons. JSON format. {diversity_instruction}{context_str}"
-        user_msg = f"Create {num_titles} unique, creative titles for {category} {event_type} ({tone}){context_str}"
-        max_tokens = 15 * num_titles + 40
-        temperature = 0.85
-    elif cost_mode == "premium":
-        examples = get_title_examples(category, event_type, tone)
-        example_block = "\n".join([
-            "[\"Innovate Now Summit\", \"Future Leaders Forum\", \"Tech Vision Expo\"]",
-            "[\"Business Growth Bootcamp\", \"Leadership Mastery Workshop\", \"Strategic Success Seminar\"]",
-            "[\"Learning Revolution Conference\", \"Education Innovation Forum\", \"Teaching Excellence Expo\"]"
-        ])
-        system_msg = f"""Expert event marketer. Generate EXACTLY {num_titles} compelling {tone.lower()} titles for {category} {event_type}.
+_TITLE_DIVERSITY = "Each title must be unique, creative, and use different wording. Avoid repeating phrases or structures. No emojis or decorative symbols."
+_TITLE_EXAMPLE_BLOCK = "\n".join([
+    "[\"Innovate Now Summit\", \"Future Leaders Forum\", \"Tech Vision Expo\"]",
+    "[\"Business Growth Bootcamp\", \"Leadership Mastery Workshop\", \"Strategic Success Seminar\"]",
+    "[\"Learning Revolution Conference\", \"Education Innovation Forum\", \"Teaching Excellence Expo\"]"
+])
+_TITLE_CONTEXT = "\n\nCRITICAL CONTEXT REQUIREMENTS:\n- Incorporate the following specific context: {context}\n- Ensure titles reflect the unique aspects mentioned in the context\n- Use context details to create more targeted and relevant titles\n- Make titles specific to the context provided\n- Avoid generic titles that don't reflect the context"
+
+# cost_mode -> (system template, user template, tokens per title, token overhead, temperature)
+_TITLE_PROMPTS = {
+    "economy": (
+        "Generate {num_titles} creative, unique {tone_lower} event titles for {category} {event_type}. 3-6 words each, no colons. JSON format. {diversity}{context_str}",
+        "Create {num_titles} unique, creative titles for {category} {event_type} ({tone}){context_str}",
+        15, 40, 0.85,
+    ),
+    "premium": (
+        """Expert event marketer. Generate EXACTLY {num_titles} compelling {tone_lower} titles for {category} {event_type}.
 
 CRITICAL REQUIREMENTS:
 - Generate EXACTLY {num_titles} titles, no more, no less
@@ -312,58 +366,99 @@ CRITICAL REQUIREMENTS:
 Examples of diverse titles:
 {example_block}
 
-Style: {tone.lower()}, memorable, actionable{context_str}"""
-        user_msg = f"Generate EXACTLY {num_titles} exceptional, unique titles for {category} {event_type} with {tone} tone. Return only a JSON array.{context_str}"
-        max_tokens = 20 * num_titles + 60
-        temperature = 0.9
-    else:
-        examples = get_title_examples(category, event_type, tone)
-        system_msg = f"""Professional event title generator. Create EXACTLY {num_titles} {tone.lower()} titles for {category} {event_type}.
+Style: {tone_lower}, memorable, actionable{context_str}""",
+        "Generate EXACTLY {num_titles} exceptional, unique titles for {category} {event_type} with {tone} tone. Return only a JSON array.{context_str}",
+        20, 60, 0.9,
+    ),
+    "balanced": (
+        """Professional event title generator. Create EXACTLY {num_titles} {tone_lower} titles for {category} {event_type}.
 
 REQUIREMENTS:
 - Generate EXACTLY {num_titles} titles
 - Length: 3-6 words each
-- Style: {tone.lower()}, memorable
+- Style: {tone_lower}, memorable
 - Format: JSON array only
 - Each title must be unique and use different words or focus
 - Avoid repeating phrases or structures
 
-Examples: {examples[0]}, {examples[1]}{context_str}"""
-        user_msg = f"Generate EXACTLY {num_titles} unique titles: {category} {event_type} ({tone}). Return JSON array only.{context_str}"
-        max_tokens = 18 * num_titles + 50
-        temperature = 0.85
+Examples: {examples[0]}, {examples[1]}{context_str}""",
+        "Generate EXACTLY {num_titles} unique titles: {category} {event_type} ({tone}). Return JSON array only.{context_str}",
+        18, 50, 0.85,
+    ),
+}
+
+_DESC_END = "Write in flowing paragraphs without bullet points or numbered lists. Use natural transitions between ideas. End with a strong call-to-action. No emojis or decorative symbols."
+_DESC_CONTEXT = "\n\nCRITICAL CONTEXT REQUIREMENTS:\n- Incorporate the following specific context: {context}\n- Ensure the description reflects the unique aspects mentioned in the context\n- Use context details to create more targeted and relevant content\n- Make the description more specific and aligned with the provided context\n- Avoid generic descriptions that don't reflect the context\n- Make the content highly relevant to the context provided"
+
+# cost_mode -> (system template, user template, chars per token, token overhead, temperature)
+_DESC_PROMPTS = {
+    "economy": (
+        "Write compelling {tone_lower} description for '{title}' - {category} {event_type}. EXACTLY {max_chars} characters. Include benefits and call-to-action. Use all available space. {end_instruction}{context_str}",
+        "Description for: {title} ({category} {event_type}, {tone}) (MUST be {max_chars} characters){context_str}",
+        2.8, 50, 0.7,
+    ),
+    "premium": (
+        """Expert copywriter. Write compelling {max_chars}-character description for '{title}' - {tone_lower} {event_type} in {category}.
+Structure: Hook → Problem → Solution → Benefits → CTA
+Tone: {tone_lower}, persuasive, action-oriented
+TARGET: Use the full {max_chars} characters available. Do not stop early. Fill all space. {end_instruction}{context_str}""",
+        "Write description for '{title}' ({category} {event_type}, {tone}). MUST be as close as possible to {max_chars} characters.{context_str}",
+        2.5, 100, 0.75,
+    ),
+    "balanced": (
+        """Professional copywriter. Create engaging {tone_lower} description for '{title}' - {category} {event_type}.
+Length: EXACTLY {max_chars} characters (use all available space, do not stop early)
+Include: value proposition, benefits, call-to-action
+Style: {tone_lower}, compelling{context_str}
+{end_instruction}""",
+        "Write description: '{title}' ({category} {event_type}, {tone}). Target {max_chars} chars. Use all available space.{context_str}",
+        2.6, 75, 0.72,
+    ),
+}
+
+def generate_titles(category, event_type, tone, num_titles=5, context=None, cost_mode="balanced"):
+    errors, warnings = validate_inputs(category, event_type, tone, num_titles, context)
+    if errors:
+        return [], {"errors": errors, "warnings": warnings}
+    
+    num_titles = max(1, min(int(num_titles), 5))
+    context_str = _TITLE_CONTEXT.format_map({"context": context.strip()}) if context and context.strip() else ""
+    system_tpl, user_tpl, per_title, overhead, temperature = _TITLE_PROMPTS.get(cost_mode, _TITLE_PROMPTS["balanced"])
+    fields = {
+        "num_titles": num_titles, "category": category, "event_type": event_type,
+        "tone": tone, "tone_lower": tone.lower(), "diversity": _TITLE_DIVERSITY,
+        "example_block": _TITLE_EXAMPLE_BLOCK, "context_str": context_str,
+        "examples": get_title_examples(category, event_type, tone),
+    }
+    system_msg = system_tpl.format_map(fields)
+    user_msg = user_tpl.format_map(fields)
+    max_tokens = per_title * num_titles + overhead
     
     start = time.time()
     
-    result = smart_api_call(system_msg, user_msg, max_tokens, temperature, cost_mode=cost_mode)
+    result, usage = smart_api_call(system_msg, user_msg, max_tokens, temperature, cost_mode=cost_mode)
     cleaned = clean_json_output(result)
     titles = []
+    seen = set()
     parsing_error = None
     
     try:
-        parsed = json.loads(cleaned)
+        parsed = orjson.loads(cleaned)
         if isinstance(parsed, list):
-            titles = [str(t).strip() for t in parsed if isinstance(t, str) and t.strip()]
-            titles = [t for t in titles if 3 <= len(t.split()) <= 6]
+            for t in parsed:
+                if isinstance(t, str):
+                    t = t.strip()
+                    if t and 3 <= len(t.split()) <= 6 and _add_unique(t, titles, seen) and len(titles) >= num_titles:
+                        break
         else:
             parsing_error = "JSON is not a list"
     except Exception as e:
         parsing_error = str(e)
-        lines = result.replace('[', '').replace(']', '').replace('"', '').split(',')
+        lines = result.translate(_JSON_CHARS).split(',')
         for line in lines:
-            clean = line.strip().strip('"').strip("'").strip('-').strip('1234567890.').strip()
-            if clean and 3 <= len(clean.split()) <= 6 and clean not in titles:
-                titles.append(clean)
-                if len(titles) >= num_titles:
-                    break
-    
-    seen = set()
-    unique_titles = []
-    for t in titles:
-        if t.lower() not in seen:
-            unique_titles.append(t)
-            seen.add(t.lower())
-    titles = unique_titles[:num_titles]
+            clean = _TITLE_STRIP.sub('', line)
+            if clean and 3 <= len(clean.split()) <= 6 and _add_unique(clean, titles, seen) and len(titles) >= num_titles:
+                break
     
     retry_count = 0
     max_retries = 2 if cost_mode == "premium" else 1
@@ -375,67 +470,42 @@ Examples: {examples[0]}, {examples[1]}{context_str}"""
         retry_system = system_msg.replace(f"EXACTLY {num_titles}", f"EXACTLY {needed} additional")
         retry_user = f"Generate {needed} more unique titles for {category} {event_type} ({tone}). Avoid these existing titles: {', '.join(titles)}. Return JSON array only."
         
-        result2 = smart_api_call(retry_system, retry_user, max_tokens + 20, temperature + 0.1, cost_mode=cost_mode)
+        result2, _ = smart_api_call(retry_system, retry_user, max_tokens + 20, temperature + 0.1, cost_mode=cost_mode)
         cleaned2 = clean_json_output(result2)
         
         try:
-            parsed2 = json.loads(cleaned2)
+            parsed2 = orjson.loads(cleaned2)
             if isinstance(parsed2, list):
                 for t in parsed2:
                     t = str(t).strip()
-                    if t and 3 <= len(t.split()) <= 6 and t.lower() not in seen:
-                        titles.append(t)
-                        seen.add(t.lower())
-                        if len(titles) >= num_titles:
-                            break
+                    if t and 3 <= len(t.split()) <= 6 and _add_unique(t, titles, seen) and len(titles) >= num_titles:
+                        break
         except Exception as e:
-            lines = result2.replace('[', '').replace(']', '').replace('"', '').split(',')
+            lines = result2.translate(_JSON_CHARS).split(',')
             for line in lines:
-                clean = line.strip().strip('"').strip("'").strip('-').strip('1234567890.').strip()
-                if clean and 3 <= len(clean.split()) <= 6 and clean.lower() not in seen:
-                    titles.append(clean)
-                    seen.add(clean.lower())
-                    if len(titles) >= num_titles:
-                        break
+                clean = _TITLE_STRIP.sub('', line)
+                if clean and 3 <= len(clean.split()) <= 6 and _add_unique(clean, titles, seen) and len(titles) >= num_titles:
+                    break
     
     titles = titles[:num_titles]
     
     fallback_used = False
-    creative_fallbacks = [
-        f"{category} Excellence Summit",
-        f"Future of {category}",
-        f"{tone} {event_type} Experience",
-        f"Next-Gen {category} Forum",
-        f"Advanced {event_type} Series",
-        f"{category} Innovation Hub",
-        f"Premier {event_type} Event",
-        f"{tone} {category} Gathering",
-        f"Professional {event_type} Network",
-        f"Elite {category} Conference"
-    ]
-    
-    fallback_index = 0
-    while len(titles) < num_titles and fallback_index < len(creative_fallbacks):
-        candidate = creative_fallbacks[fallback_index]
-        if candidate.lower() not in seen and 3 <= len(candidate.split()) <= 6:
-            titles.append(candidate)
-            seen.add(candidate.lower())
+    for candidate, candidate_key in _creative_fallbacks(category, event_type, tone):
+        if len(titles) >= num_titles:
+            break
+        if _add_unique(candidate, titles, seen, candidate_key):
             fallback_used = True
-        fallback_index += 1
     
     i = 1
     while len(titles) < num_titles:
-        filler = f"{category} {event_type} {i}"
-        if filler.lower() not in seen:
-            titles.append(filler)
-            seen.add(filler.lower())
+        if _add_unique(f"{category} {event_type} {i}", titles, seen):
             fallback_used = True
         i += 1
     
     end = time.time()
     
-    prompt_tokens = count_tokens(system_msg) + count_tokens(user_msg)
-    completion_tokens = count_tokens(result)
+    prompt_tokens = usage['prompt_tokens']
+    completion_tokens = usage['completion_tokens']
     total_tokens = prompt_tokens + completion_tokens
     cost = estimate_cost(prompt_tokens, completion_tokens)
     efficiency_score = len(titles) / cost if cost > 0 else 0
@@ -474,56 +544,28 @@ Examples: {examples[0]}, {examples[1]}{context_str}"""
 def generate_description(title, category, event_type, tone, context=None, max_chars=5000, cost_mode="balanced"):
     max_chars = max(100, min(int(max_chars), 5000))
     
-    # Enhanced context handling for descriptions
-    context_str = ""
-    if context and context.strip():
-        context_str = f"\n\nCRITICAL CONTEXT REQUIREMENTS:\n- Incorporate the following specific context: {context.strip()}\n- Ensure the description reflects the unique aspects mentioned in the context\n- Use context details to create more targeted and relevant content\n- Make the description more specific and aligned with the provided context\n- Avoid generic descriptions that don't reflect the context\n- Make the content highly relevant to the context provided"
-    
-    end_instruction = "Write in flowing paragraphs without bullet points or numbered lists. Use natural transitions between ideas. End with a strong call-to-action. No emojis or decorative symbols."
-    if cost_mode == "economy":
-        system_msg = f"Write compelling {tone.lower()} description for '{title}' - {category} {event_type}. EXACTLY {max_chars} characters. Include benefits and call-to-action. Use all available space. {end_instruction}{context_str}"
-        user_msg = f"Description for: {title} ({category} {event_type}, {tone}) (MUST be {max_chars} characters){context_str}"
-        max_tokens = int(max_chars/2.8) + 50
-        temperature = 0.7
-    elif cost_mode == "premium":
-        system_msg = f"""Expert copywriter. Write compelling {max_chars}-character description for '{title}' - {tone.lower()} {event_type} in {category}.
-Structure: Hook → Problem → Solution → Benefits → CTA
-Tone: {tone.lower()}, persuasive, action-oriented
-TARGET: Use the full {max_chars} characters available. Do not stop early. Fill all space. {end_instruction}{context_str}"""
-        user_msg = f"Write description for '{title}' ({category} {event_type}, {tone}). MUST be as close as possible to {max_chars} characters.{context_str}"
-        max_tokens = int(max_chars/2.5) + 100
-        temperature = 0.75
-    else:
-        system_msg = f"""Professional copywriter. Create engaging {tone.lower()} description for '{title}' - {category} {event_type}.
-Length: EXACTLY {max_chars} characters (use all available space, do not stop early)
-Include: value proposition, benefits, call-to-action
-Style: {tone.lower()}, compelling{context_str}
-{end_instruction}"""
-        user_msg = f"Write description: '{title}' ({category} {event_type}, {tone}). Target {max_chars} chars. Use all available space.{context_str}"
-        max_tokens = int(max_chars/2.6) + 75
-        temperature = 0.72
+    context_str = _DESC_CONTEXT.format_map({"context": context.strip()}) if context and context.strip() else ""
+    system_tpl, user_tpl, chars_per_token, overhead, temperature = _DESC_PROMPTS.get(cost_mode, _DESC_PROMPTS["balanced"])
+    fields = {
+        "title": title, "category": category, "event_type": event_type,
+        "tone": tone, "tone_lower": tone.lower(), "max_chars": max_chars,
+        "end_instruction": _DESC_END, "context_str": context_str,
+    }
+    system_msg = system_tpl.format_map(fields)
+    user_msg = user_tpl.format_map(fields)
+    max_tokens = int(max_chars/chars_per_token) + overhead
     
     start = time.time()
     
     try:
-        description = smart_api_call(system_msg, user_msg, max_tokens, temperature, cost_mode=cost_mode)
-        
-        if len(description) < int(0.75 * max_chars) and cost_mode != "economy":
-            remaining_chars = max_chars - len(description)
-            extend_system = f"You are extending an event description. Add {remaining_chars} more characters to make it more detailed and compelling."
-            extend_user = f"Current description: {description}\n\nExpand this by adding more details, benefits, or call-to-action to reach closer to {max_chars} total characters."
-            
-            extension = smart_api_call(extend_system, extend_user, int(remaining_chars/2.5) + 30, temperature, cost_mode=cost_mode)
-            if extension and not extension.lower().startswith(description.lower()[:20]):
-                description = description + " " + extension
-        
+        description, usage = smart_api_call(system_msg, user_msg, max_tokens, temperature, cost_mode=cost_mode)
     except Exception as e:
         return "", {"error": str(e)}
     
     end = time.time()
     
-    prompt_tokens = count_tokens(system_msg) + count_tokens(user_msg)
-    completion_tokens = count_tokens(description)
+    prompt_tokens = usage['prompt_tokens']
+    completion_tokens = usage['completion_tokens']
     total_tokens = prompt_tokens + completion_tokens
     cost = estimate_cost(prompt_tokens, completion_tokens)
     too_short = len(description) < int(0.6 * max_chars)
@@ -560,6 +602,7 @@ Style: {tone.lower()}, compelling{context_str}
     return description, logs
 
 def get_global_analytics():
+    efficiency_score = analytics.get_efficiency_score()
     return {
         "total_requests": analytics.metrics['total_requests'],
         "cache_hits": analytics.metrics['cache_hits'],
@@ -568,12 +611,12 @@ def get_global_analytics():
         "total_tokens": analytics.metrics['total_tokens'],
         "avg_response_time": f"{analytics.metrics['avg_response_time']:.2f}s",
         "error_rate": f"{analytics.metrics['error_rate'] * 100:.1f}%",
-        "efficiency_score": f"{analytics.get_efficiency_score():.1f}%",
+        "efficiency_score": f"{efficiency_score:.1f}%",
         "cost_savings": f"${(analytics.metrics['cache_hits'] * 0.002):.4f}",
-        "recommendations": get_optimization_recommendations()
+        "recommendations": get_optimization_recommendations(efficiency_score)
     }
 
-def get_optimization_recommendations():
+def get_optimization_recommendations(efficiency_score=None):
     recommendations = []
     cache_rate = analytics.metrics['cache_hits'] / max(analytics.metrics['total_requests'], 1)
     avg_cost = analytics.metrics['total_cost'] / max(analytics.metrics['total_requests'], 1)
@@ -599,7 +642,8 @@ def get_optimization_recommendations():
     if analytics.metrics['error_rate'] > 0.05:
         recommendations.append("Error rate detected - verify API key and network stability")
     
-    efficiency_score = analytics.get_efficiency_score()
+    if efficiency_score is None:
+        efficiency_score = analytics.get_efficiency_score()
     if efficiency_score > 80:
         recommendations.append("Excellent performance - system optimized")
     elif efficiency_score > 60:
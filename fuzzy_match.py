@@ -0,0 +1,20 @@
+from functools import lru_cache
+from rapidfuzz import process, fuzz
+
+@lru_cache(maxsize=512)
+def _fuzzy_match(user_input, valid_options):
+    # fuzz.ratio is the same normalized similarity difflib.get_close_matches scored with
+    match = process.extractOne(user_input, valid_options, scorer=fuzz.ratio, processor=None, score_cutoff=75)
+    if match:
+        return valid_options[match[2]]
+    return user_input
+
+@lru_cache(maxsize=128)
+def _option_set(valid_options):
+    return frozenset(valid_options)
+
+def fuzzy_correct(user_input, valid_options):
+    valid_options = tuple(valid_options)
+    if not user_input or user_input in _option_set(valid_options):
+        return user_input
+    return _fuzzy_match(user_input, valid_options)